@@ -1,15 +1,53 @@
 import streamlit as st
 import os
 import time
-import base64
-import requests
+import asyncio
+import hashlib
+import io
+import re
+import threading
+import wave
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from spitch import Spitch
 from dotenv import load_dotenv
 
+# Heavy third-party modules (spitch, httpx, base64's binascii backend) are
+# imported inside the functions that first need them to keep cold-start fast
+
 # Load environment variables
 load_dotenv()
 
+# Provider configuration is immutable for the process; read it once so the
+# hot paths never touch the environment dict
+SPITCH_KEY = os.getenv("SPITCH_API_KEY")
+AWARRI_URL = os.getenv("AWARRI_TTS_URL")
+AWARRI_KEY = os.getenv("AWARRI_API_KEY")
+SPITCH_WARMUP = os.getenv("TTS_WARMUP_SPITCH", "").lower() in ("1", "true")
+
+# Created lazily so cold start doesn't pay the SDK import; guarded by a
+# lock because worker threads may race on first use
+_spitch_client = None
+_spitch_client_ready = False
+_spitch_client_lock = threading.Lock()
+
+def get_spitch_client():
+    """Return the Spitch client, creating it on first use; None if that fails
+
+    Kept as a module-level hook for monkeypatching.
+    """
+    global _spitch_client, _spitch_client_ready
+    if not _spitch_client_ready:
+        with _spitch_client_lock:
+            if not _spitch_client_ready:
+                try:
+                    from spitch import Spitch
+                    _spitch_client = Spitch(api_key=SPITCH_KEY)
+                except Exception:
+                    _spitch_client = None
+                _spitch_client_ready = True
+    return _spitch_client
+
 # Configure page
 st.set_page_config(
     page_title="Hausa TTS Comparison",
@@ -17,9 +55,12 @@ st.set_page_config(
     layout="wide"
 )
 
+HISTORY_MAX_ENTRIES = 50
+HISTORY_PAGE_SIZE = 10
+
 # Initialize session state for history
 if 'audio_history' not in st.session_state:
-    st.session_state.audio_history = []
+    st.session_state.audio_history = deque(maxlen=HISTORY_MAX_ENTRIES)
 
 if 'current_spitch_audio' not in st.session_state:
     st.session_state.current_spitch_audio = None
@@ -27,106 +68,266 @@ if 'current_spitch_audio' not in st.session_state:
 if 'current_awarri_audio' not in st.session_state:
     st.session_state.current_awarri_audio = None
 
+TTS_CACHE_MAX_ENTRIES = 128
+
+@st.cache_data(ttl=24 * 60 * 60, show_spinner=False, max_entries=64)
+def _decode_b64(audio_base64):
+    """Decode base64 audio, memoized so identical payloads decode once"""
+    import binascii
+    return binascii.a2b_base64(audio_base64)
+
 @st.cache_resource
-def initialize_spitch():
-    """Initialize Spitch client"""
-    try:
-        os.environ["SPITCH_API_KEY"] = os.getenv("SPITCH_API_KEY")
-        return Spitch()
-    except Exception as e:
-        st.error(f"Failed to initialize Spitch: {str(e)}")
+def _tts_cache():
+    """In-memory LRU of recent TTS results, shared across sessions"""
+    return OrderedDict()
+
+@st.cache_resource
+def _disk_cache():
+    """Disk-backed TTS cache so repeat queries survive app restarts"""
+    import diskcache
+    return diskcache.Cache('/tmp/tts_cache', size_limit=512 * 1024 * 1024)
+
+def _tts_cache_key(text, model, voice):
+    return hashlib.md5(f"{text}|{model}|{voice}".encode()).digest()
+
+def _disk_cache_key(text, model, voice):
+    return hashlib.sha1(f"{model}|{text}|{voice}".encode()).hexdigest()
+
+def _tts_cache_get(text, model, voice):
+    """Return cached audio for (text, model, voice), or None on miss"""
+    if st.session_state.get('force_regenerate'):
         return None
 
-def generate_spitch_audio(text, voice):
-    """Generate audio using Spitch TTS and return base64"""
-    client = initialize_spitch()
+    cache = _tts_cache()
+    key = _tts_cache_key(text, model, voice)
+    if key in cache:
+        cache.move_to_end(key)
+        return cache[key]
+
+    # Fall through to the disk tier and promote hits into memory
+    audio = _disk_cache().get(_disk_cache_key(text, model, voice))
+    if audio is not None:
+        cache[key] = audio
+        if len(cache) > TTS_CACHE_MAX_ENTRIES:
+            cache.popitem(last=False)
+    return audio
+
+def _tts_cache_put(text, model, voice, audio):
+    """Store audio for (text, model, voice) in both cache tiers"""
+    cache = _tts_cache()
+    cache[_tts_cache_key(text, model, voice)] = audio
+    if len(cache) > TTS_CACHE_MAX_ENTRIES:
+        cache.popitem(last=False)
+    _disk_cache().set(_disk_cache_key(text, model, voice), audio, expire=24 * 60 * 60)
+
+@st.cache_resource
+def _tts_semaphore():
+    """Bound concurrent outbound TTS requests across all sessions"""
+    return threading.BoundedSemaphore(2)
+
+@st.cache_resource
+def get_http_client():
+    """Shared pooled HTTP client so repeat generations reuse keep-alive connections"""
+    import httpx
+    return httpx.Client(
+        timeout=httpx.Timeout(30.0, connect=10.0),
+        limits=httpx.Limits(max_connections=8, max_keepalive_connections=4),
+        headers={
+            'accept': 'application/json',
+            'Content-Type': 'application/json'
+        }
+    )
+
+SENTENCE_SPLIT_RE = re.compile(r'(?<=[.!?])\s+')
+
+def _spitch_bytes_one(text: str, voice: str) -> bytes:
+    """Synthesize a single segment with Spitch and return raw audio bytes"""
+    client = get_spitch_client()
     if not client:
-        return None, 0.0
-    
-    try:
-        start_time = time.time()
+        raise RuntimeError("Spitch client not initialized")
+
+    # Hold a concurrency slot for the whole request so the per-sentence
+    # fan-out is bounded along with everything else
+    with _tts_semaphore():
         response = client.speech.generate(
             text=text,
             language="ha",
             voice=voice.lower()
         )
-        
-        audio_bytes = response.read()
-        latency = time.time() - start_time
-        
-        # Convert to base64 for storage
-        audio_base64 = base64.b64encode(audio_bytes).decode('utf-8')
-        
-        return audio_base64, latency
-        
+
+        # Accumulate 64 KiB chunks into a bytearray instead of buffering the
+        # whole payload at once, keeping peak memory to one chunk plus the buffer
+        if hasattr(response, 'iter_bytes'):
+            buf = bytearray()
+            for chunk in response.iter_bytes(chunk_size=64 * 1024):
+                buf.extend(chunk)
+            return bytes(buf)
+        return response.read()
+
+def _concat_wav(chunks):
+    """Re-mux WAV chunks into one file using the parameters of the first"""
+    frames = []
+    params = None
+    for chunk in chunks:
+        with wave.open(io.BytesIO(chunk), 'rb') as wav:
+            if params is None:
+                params = wav.getparams()
+            frames.append(wav.readframes(wav.getnframes()))
+
+    output = io.BytesIO()
+    with wave.open(output, 'wb') as wav:
+        wav.setparams(params)
+        for frame_data in frames:
+            wav.writeframes(frame_data)
+    return output.getvalue()
+
+@st.cache_data(ttl=24 * 60 * 60, show_spinner=False, max_entries=256)
+def _spitch_bytes(text: str, voice: str) -> bytes:
+    """Synthesize text with Spitch, fanning sentences out across parallel requests"""
+    segments = [s for s in SENTENCE_SPLIT_RE.split(text.strip()) if s]
+    if len(segments) <= 1:
+        return _spitch_bytes_one(text, voice)
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        chunks = list(executor.map(lambda segment: _spitch_bytes_one(segment, voice), segments))
+
+    try:
+        return _concat_wav(chunks)
+    except wave.Error:
+        # Provider returned something other than plain PCM WAV;
+        # synthesize the whole text in one request instead
+        return _spitch_bytes_one(text, voice)
+
+async def _spitch_request(text, voice):
+    """Call Spitch asynchronously and return (bytes, latency)
+
+    Only the pure provider call runs in a worker thread; cache lookup,
+    session-state access and error display stay on the script thread,
+    which has the ScriptRunContext they need.
+    """
+    cached = _tts_cache_get(text, 'spitch', voice)
+    if cached is not None:
+        return cached, 0.0
+
+    try:
+        # Force regenerate has to defeat the st.cache_data tier too,
+        # otherwise the 24h entry would answer instead of the provider
+        if st.session_state.get('force_regenerate'):
+            _spitch_bytes.clear(text, voice)
+
+        start_time = time.perf_counter()
+        audio_bytes = await asyncio.to_thread(_spitch_bytes, text, voice)
+        latency = time.perf_counter() - start_time
+
+        _tts_cache_put(text, 'spitch', voice, audio_bytes)
+        return audio_bytes, latency
+
     except Exception as e:
         st.error(f"Spitch generation failed: {str(e)}")
         return None, 0.0
 
-def generate_awarri_audio(text):
-    """Generate audio using Awarri TTS and return base64"""
+def generate_spitch_audio(text, voice):
+    """Generate audio using Spitch TTS and return raw bytes"""
+    return asyncio.run(_spitch_request(text, voice))
+
+@st.cache_data(ttl=24 * 60 * 60, show_spinner=False, max_entries=256)
+def _awarri_bytes(text: str) -> bytes:
+    """POST text to the Awarri endpoint and return decoded audio bytes"""
+    import orjson
+
+    if not AWARRI_URL or not AWARRI_KEY:
+        raise RuntimeError("Awarri API credentials not configured")
+
+    # orjson serializes straight to bytes, skipping the str round-trip
+    # stdlib json would do inside the client
+    body = orjson.dumps({
+        'api_key': AWARRI_KEY,
+        'audio_txt': text,
+        'lang': 'hausa'
+    })
+
+    with _tts_semaphore():
+        response = get_http_client().post(AWARRI_URL, content=body)
+
+    if response.status_code != 200:
+        raise RuntimeError(f"Awarri API error: {response.status_code} - {response.text}")
+
+    result = orjson.loads(response.content)
+    if 'base64_data' not in result:
+        raise RuntimeError("No 'base64_data' in Awarri response")
+
+    # Decode once at reception; everything downstream works with bytes
+    return _decode_b64(result['base64_data'])
+
+async def _awarri_request(text):
+    """Call the Awarri TTS endpoint asynchronously and return (bytes, latency)"""
+    cached = _tts_cache_get(text, 'awarri', None)
+    if cached is not None:
+        return cached, 0.0
+
     try:
-        url = os.getenv("AWARRI_TTS_URL")
-        api_key = os.getenv("AWARRI_API_KEY")
-        
-        if not url or not api_key:
-            st.error("Awarri API credentials not configured")
-            return None, 0.0
-        
-        headers = {
-            'accept': 'application/json',
-            'Content-Type': 'application/json'
-        }
-        
-        data = {
-            'api_key': api_key,
-            'audio_txt': text,
-            'lang': 'hausa'
-        }
-        
-        start_time = time.time()
-        response = requests.post(url, headers=headers, json=data)
-        latency = time.time() - start_time
-        
-        if response.status_code == 200:
-            result = response.json()
-            
-            if 'base64_data' in result:
-                # Already in base64 format
-                return result['base64_data'], latency
-            else:
-                st.error("No 'base64_data' in Awarri response")
-                return None, 0.0
-        else:
-            st.error(f"Awarri API error: {response.status_code} - {response.text}")
-            return None, 0.0
-            
+        # Force regenerate has to defeat the st.cache_data tier too,
+        # otherwise the 24h entry would answer instead of the provider
+        if st.session_state.get('force_regenerate'):
+            _awarri_bytes.clear(text)
+
+        start_time = time.perf_counter()
+        audio_bytes = await asyncio.to_thread(_awarri_bytes, text)
+        latency = time.perf_counter() - start_time
+
+        _tts_cache_put(text, 'awarri', None, audio_bytes)
+        return audio_bytes, latency
+
     except Exception as e:
         st.error(f"Awarri generation failed: {str(e)}")
         return None, 0.0
 
-def add_to_history(text, model, voice, audio_base64, latency):
+def generate_awarri_audio(text):
+    """Generate audio using Awarri TTS and return raw bytes"""
+    return asyncio.run(_awarri_request(text))
+
+def add_to_history(text, model, voice, audio_bytes, latency):
     """Add generated audio to history"""
     history_entry = {
         'timestamp': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
         'text': text,
         'model': model,
         'voice': voice,
-        'audio_base64': audio_base64,
+        'audio_bytes': audio_bytes,
         'latency': latency
     }
-    st.session_state.audio_history.insert(0, history_entry)  # Add to beginning
+    st.session_state.audio_history.appendleft(history_entry)  # Add to beginning
 
 def clear_current_display():
     """Clear current audio displays"""
     st.session_state.current_spitch_audio = None
     st.session_state.current_awarri_audio = None
 
-def display_audio_from_base64(audio_base64):
-    """Display audio player from base64 string"""
-    audio_bytes = base64.b64decode(audio_base64)
+def display_audio(audio_bytes):
+    """Display audio player from raw bytes"""
     st.audio(audio_bytes, format='audio/wav')
 
+@st.cache_resource
+def _warm_connections():
+    """Probe the providers once in the background so DNS resolution and the
+    connection pool are warm before the first real generation"""
+    def _probe():
+        if AWARRI_URL:
+            try:
+                get_http_client().head(AWARRI_URL, timeout=5)
+            except Exception:
+                pass
+        if SPITCH_WARMUP:
+            try:
+                _spitch_bytes_one("a", "Hasan")
+            except Exception:
+                pass
+
+    threading.Thread(target=_probe, daemon=True).start()
+    return True
+
+_warm_connections()
+
 # Main UI
 st.title("🎙️ Hausa Text-to-Speech Comparison")
 st.markdown("Compare **Spitch AI** and **Awarri** TTS models for Hausa language")
@@ -163,6 +364,11 @@ with col1:
 
 with col2:
     st.info("ℹ️ Awarri uses default voice")
+    st.checkbox(
+        "🔄 Force regenerate",
+        key="force_regenerate",
+        help="Bypass the cache and always call the provider"
+    )
 
 with col3:
     if st.button("🗑️ Clear", use_container_width=True):
@@ -175,7 +381,32 @@ st.divider()
 # Generation buttons
 st.subheader("🎵 Generate Audio")
 
-col_btn1, col_btn2 = st.columns(2)
+async def _generate_both(text, voice, on_result=None):
+    """Run Spitch and Awarri generation concurrently under one event loop"""
+    # Cap outbound TTS concurrency; scoped to this run since the
+    # semaphore is bound to the event loop asyncio.run creates.
+    semaphore = asyncio.Semaphore(2)
+
+    async def _limited(name, coro):
+        async with semaphore:
+            result = await coro
+        # Report each provider as it finishes so the caller can surface
+        # the faster one without waiting for the slower
+        if on_result:
+            on_result(name, result)
+        return name, result
+
+    pairs = await asyncio.gather(
+        _limited('spitch', _spitch_request(text, voice)),
+        _limited('awarri', _awarri_request(text))
+    )
+    return dict(pairs)
+
+def generate_both_audio(text, voice, on_result=None):
+    """Generate with Spitch and Awarri in parallel and return both results"""
+    return asyncio.run(_generate_both(text, voice, on_result))
+
+col_btn1, col_btn2, col_btn3 = st.columns(3)
 
 with col_btn1:
     if st.button("🔵 Generate with Spitch", type="primary", use_container_width=True):
@@ -183,10 +414,10 @@ with col_btn1:
             st.warning("Please enter text before generating")
         else:
             with st.spinner(f"Generating with Spitch ({voice_selection} voice)..."):
-                audio_base64, latency = generate_spitch_audio(text_input, voice_selection)
-                if audio_base64:
+                audio_bytes, latency = generate_spitch_audio(text_input, voice_selection)
+                if audio_bytes:
                     st.session_state.current_spitch_audio = {
-                        'audio_base64': audio_base64,
+                        'audio_bytes': audio_bytes,
                         'latency': latency,
                         'text': text_input,
                         'voice': voice_selection
@@ -199,16 +430,59 @@ with col_btn2:
             st.warning("Please enter text before generating")
         else:
             with st.spinner("Generating with Awarri..."):
-                audio_base64, latency = generate_awarri_audio(text_input)
-                if audio_base64:
+                audio_bytes, latency = generate_awarri_audio(text_input)
+                if audio_bytes:
                     st.session_state.current_awarri_audio = {
-                        'audio_base64': audio_base64,
+                        'audio_bytes': audio_bytes,
                         'latency': latency,
                         'text': text_input,
                         'voice': None
                     }
                     st.success(f"Generated in {latency:.2f}s")
 
+with col_btn3:
+    if st.button("🟣 Generate Both", type="primary", use_container_width=True):
+        if not text_input.strip():
+            st.warning("Please enter text before generating")
+        else:
+            # Placeholder per provider so the faster result is playable
+            # while the slower one is still in flight
+            early_slots = {'spitch': st.empty(), 'awarri': st.empty()}
+
+            def _publish_early(name, result):
+                early_bytes, early_latency = result
+                if not early_bytes:
+                    return
+                if name == 'spitch':
+                    st.session_state.current_spitch_audio = {
+                        'audio_bytes': early_bytes,
+                        'latency': early_latency,
+                        'text': text_input,
+                        'voice': voice_selection
+                    }
+                else:
+                    st.session_state.current_awarri_audio = {
+                        'audio_bytes': early_bytes,
+                        'latency': early_latency,
+                        'text': text_input,
+                        'voice': None
+                    }
+                with early_slots[name].container():
+                    st.caption(f"{name.title()} ready in {early_latency:.2f}s")
+                    display_audio(early_bytes)
+
+            with st.spinner(f"Generating with Spitch ({voice_selection} voice) and Awarri in parallel..."):
+                results = generate_both_audio(text_input, voice_selection, on_result=_publish_early)
+
+            # The Current Generation section below shows both players now
+            for slot in early_slots.values():
+                slot.empty()
+
+            spitch_bytes, spitch_latency = results['spitch']
+            awarri_bytes, awarri_latency = results['awarri']
+            if spitch_bytes and awarri_bytes:
+                st.success(f"Spitch: {spitch_latency:.2f}s | Awarri: {awarri_latency:.2f}s")
+
 st.divider()
 
 # Display current generations
@@ -221,7 +495,7 @@ if st.session_state.current_spitch_audio or st.session_state.current_awarri_audi
         st.markdown("### 🔴 Spitch AI")
         if st.session_state.current_spitch_audio:
             spitch_data = st.session_state.current_spitch_audio
-            display_audio_from_base64(spitch_data['audio_base64'])
+            display_audio(spitch_data['audio_bytes'])
             st.metric("Latency", f"{spitch_data['latency']:.2f}s")
             st.caption(f"Voice: {spitch_data['voice']}")
             
@@ -230,7 +504,7 @@ if st.session_state.current_spitch_audio or st.session_state.current_awarri_audi
                     spitch_data['text'],
                     "Spitch AI",
                     spitch_data['voice'],
-                    spitch_data['audio_base64'],
+                    spitch_data['audio_bytes'],
                     spitch_data['latency']
                 )
                 st.success("Saved to history!")
@@ -242,7 +516,7 @@ if st.session_state.current_spitch_audio or st.session_state.current_awarri_audi
         st.markdown("### 🔵 Awarri")
         if st.session_state.current_awarri_audio:
             awarri_data = st.session_state.current_awarri_audio
-            display_audio_from_base64(awarri_data['audio_base64'])
+            display_audio(awarri_data['audio_bytes'])
             st.metric("Latency", f"{awarri_data['latency']:.2f}s")
             st.caption("Voice: Default")
             
@@ -251,7 +525,7 @@ if st.session_state.current_spitch_audio or st.session_state.current_awarri_audi
                     awarri_data['text'],
                     "Awarri",
                     "Default",
-                    awarri_data['audio_base64'],
+                    awarri_data['audio_bytes'],
                     awarri_data['latency']
                 )
                 st.success("Saved to history!")
@@ -265,9 +539,26 @@ if st.session_state.current_spitch_audio or st.session_state.current_awarri_audi
 st.subheader("📜 Generation History")
 
 if st.session_state.audio_history:
-    st.caption(f"Total generations saved: {len(st.session_state.audio_history)}")
-    
-    for idx, entry in enumerate(st.session_state.audio_history):
+    col_hist_meta, col_hist_clear = st.columns([4, 1])
+    with col_hist_meta:
+        st.caption(f"Total generations saved: {len(st.session_state.audio_history)} (most recent {HISTORY_MAX_ENTRIES} kept)")
+    with col_hist_clear:
+        if st.button("🗑️ Clear history", use_container_width=True):
+            st.session_state.audio_history.clear()
+            for key in [k for k in st.session_state if k.startswith('hist_open_')]:
+                del st.session_state[key]
+            _decode_b64.clear()
+            st.rerun()
+
+    num_pages = (len(st.session_state.audio_history) + HISTORY_PAGE_SIZE - 1) // HISTORY_PAGE_SIZE
+    if num_pages > 1:
+        page = st.selectbox("Page", options=range(1, num_pages + 1), key="history_page")
+    else:
+        page = 1
+    page_start = (page - 1) * HISTORY_PAGE_SIZE
+    page_entries = list(st.session_state.audio_history)[page_start:page_start + HISTORY_PAGE_SIZE]
+
+    for idx, entry in enumerate(page_entries, start=page_start):
         with st.expander(f"🎵 {entry['model']} - {entry['timestamp']}", expanded=(idx==0)):
             col_hist1, col_hist2 = st.columns([3, 1])
             
@@ -275,8 +566,13 @@ if st.session_state.audio_history:
                 st.markdown(f"**Text:** {entry['text']}")
                 st.markdown(f"**Model:** {entry['model']} | **Voice:** {entry['voice']} | **Latency:** {entry['latency']:.2f}s")
                 
-                # Audio player
-                display_audio_from_base64(entry['audio_base64'])
+                # Only materialize the audio element when the user asks for it,
+                # so a page of history entries doesn't ship a player per rerun
+                if idx == 0 or st.session_state.get(f'hist_open_{idx}'):
+                    display_audio(entry['audio_bytes'])
+                elif st.button("▶ Load player", key=f'hist_load_{idx}'):
+                    st.session_state[f'hist_open_{idx}'] = True
+                    st.rerun()
             
             with col_hist2:
                 st.markdown(f"**Time:**")